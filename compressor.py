@@ -4,23 +4,40 @@ Privacy-First PDF Compressor - Standalone Python Script
 A local alternative to the web-based PDF compressor.
 
 Usage:
-    python compressor.py <input.pdf> [--quality low|medium|high] [--output filename.pdf]
+    python compressor.py <input.pdf> [--quality low|medium|high] [--output filename.pdf] [--zopfli]
 
 Requirements:
     pip install pypdf
+    pip install zopfli  (optional, smaller content streams)
 """
 
 import argparse
+import io
+import mmap
+import os
 import sys
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from functools import partial
 from pathlib import Path
 
 try:
     from pypdf import PdfReader, PdfWriter
+    from pypdf.generic import ArrayObject, EncodedStreamObject, NameObject, NullObject
 except ImportError:
     print("Error: pypdf library not found.")
     print("Install it with: pip install pypdf")
     sys.exit(1)
 
+# Optional Zopfli support (smaller, zlib-compatible deflate output)
+ZOPFLI_SUPPORT = False
+try:
+    import zopfli.zlib
+    ZOPFLI_SUPPORT = True
+except ImportError:
+    pass
+
 
 def format_size(size_bytes: int) -> str:
     """Format file size in human-readable format."""
@@ -31,29 +48,108 @@ def format_size(size_bytes: int) -> str:
     return f"{size_bytes:.2f} TB"
 
 
+def print_progress(current: int, total: int, width: int = 40):
+    """Print an in-place progress bar."""
+    progress = int((current / total) * width)
+    bar = '█' * progress + '░' * (width - progress)
+    print(f"\r   [{bar}] {current}/{total}", end='', flush=True)
+
+
 def get_compression_params(quality: str) -> dict:
     """Get compression parameters based on quality setting."""
     params = {
         'low': {
             'remove_duplication': True,
             'remove_images': False,
-            'image_quality': 30
+            'image_quality': 30,
+            'zopfli': False
         },
         'medium': {
             'remove_duplication': True,
             'remove_images': False,
-            'image_quality': 50
+            'image_quality': 50,
+            'zopfli': False
         },
         'high': {
             'remove_duplication': True,
             'remove_images': False,
-            'image_quality': 75
+            'image_quality': 75,
+            'zopfli': True
         }
     }
     return params.get(quality, params['medium'])
 
 
-def compress_pdf(input_path: str, output_path: str = None, quality: str = 'medium') -> tuple:
+def deflate(data: bytes, use_zopfli: bool = False) -> bytes:
+    """Deflate a content stream (runs in a worker process)."""
+    if use_zopfli:
+        return zopfli.zlib.compress(data, numiterations=15)
+    return zlib.compress(data)
+
+
+def get_contents_size(page) -> tuple:
+    """Get the stored size of a page's content streams and whether all are deflated."""
+    contents = page['/Contents'].get_object()
+    streams = contents if isinstance(contents, ArrayObject) else [contents]
+    
+    size, deflated = 0, True
+    for stream in streams:
+        stream = stream.get_object()
+        filters = stream.get('/Filter', ArrayObject())
+        if not isinstance(filters, ArrayObject):
+            filters = [filters]
+        deflated = deflated and '/FlateDecode' in filters
+        size += len(stream._data)
+    return size, deflated
+
+
+def compress_page_contents(pages, use_zopfli: bool = False, min_parallel_pages: int = 16,
+                           skip_deflated_below: int = 4096) -> int:
+    """
+    Deflate the content streams of pages, in parallel for larger documents.
+    
+    Pages whose contents are already deflated and smaller than skip_deflated_below
+    bytes are left alone, and new streams are only kept when they are smaller than
+    the stored ones.
+    
+    Returns:
+        Number of pages whose content streams were left unchanged
+    """
+    contents, unchanged = [], 0
+    for page in pages:
+        if isinstance(page.get('/Contents', NullObject()).get_object(), NullObject):
+            continue
+        stored_size, deflated = get_contents_size(page)
+        if deflated and stored_size < skip_deflated_below:
+            unchanged += 1
+            continue
+        contents.append((page, stored_size))
+    data = [page.get_contents().get_data() for page, _ in contents]
+    
+    encode = partial(deflate, use_zopfli=use_zopfli)
+    workers = min(os.cpu_count() or 1, 8)
+    parallel = workers > 1 and len(data) >= min_parallel_pages
+    
+    with ProcessPoolExecutor(max_workers=workers) if parallel else nullcontext() as executor:
+        compressed = executor.map(encode, data, chunksize=4) if parallel else map(encode, data)
+        
+        for i, ((page, stored_size), chunk) in enumerate(zip(contents, compressed), 1):
+            print_progress(i, len(contents))
+            if len(chunk) >= stored_size:
+                unchanged += 1
+                continue
+            
+            # Attach the already-deflated bytes, as pypdf's own flate_encode does
+            stream = EncodedStreamObject()
+            stream[NameObject('/Filter')] = NameObject('/FlateDecode')
+            stream._data = chunk
+            page.replace_contents(stream)
+    
+    return unchanged
+
+
+def compress_pdf(input_path: str, output_path: str = None, quality: str = 'medium',
+                 zopfli: bool = False) -> tuple:
     """
     Compress a PDF file.
     
@@ -61,6 +157,7 @@ def compress_pdf(input_path: str, output_path: str = None, quality: str = 'mediu
         input_path: Path to the input PDF file
         output_path: Path for the output file (optional)
         quality: Compression quality (low, medium, high)
+        zopfli: Deflate content streams with Zopfli (implied by high quality)
     
     Returns:
         Tuple of (original_size, compressed_size, output_path)
@@ -81,42 +178,54 @@ def compress_pdf(input_path: str, output_path: str = None, quality: str = 'mediu
     
     # Get original file size
     original_size = input_file.stat().st_size
+    if original_size == 0:
+        raise ValueError("Input file is empty")
     
     # Get compression parameters
     params = get_compression_params(quality)
+    use_zopfli = zopfli or params['zopfli']
+    if use_zopfli and not ZOPFLI_SUPPORT:
+        if zopfli:
+            print("\n⚠️  zopfli library not found, falling back to zlib.")
+            print("   Install it with: pip install zopfli")
+        use_zopfli = False
     
-    # Read and compress PDF
+    # Read and compress PDF (memory-mapped, so pypdf seeks through the page
+    # cache instead of first copying the whole file into memory)
     print(f"\n📄 Reading: {input_file.name}")
-    reader = PdfReader(str(input_file))
-    writer = PdfWriter()
-    
-    total_pages = len(reader.pages)
-    print(f"📑 Total pages: {total_pages}")
-    print(f"🔧 Quality: {quality.capitalize()}")
-    print("\n⏳ Compressing...")
-    
-    # Copy all pages to writer
-    for i, page in enumerate(reader.pages, 1):
-        writer.add_page(page)
-        # Progress indicator
-        progress = int((i / total_pages) * 40)
-        bar = '█' * progress + '░' * (40 - progress)
-        print(f"\r   [{bar}] {i}/{total_pages}", end='', flush=True)
-    
-    print()  # New line after progress bar
-    
-    # Apply compression - remove duplication
-    if params['remove_duplication']:
-        writer.add_metadata(reader.metadata or {})
+    with open(input_file, 'rb') as source, \
+            mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        reader = PdfReader(mapped)
+        writer = PdfWriter()
         
-    # Compress content streams
-    for page in writer.pages:
-        page.compress_content_streams()
+        total_pages = len(reader.pages)
+        print(f"📑 Total pages: {total_pages}")
+        print(f"🔧 Quality: {quality.capitalize()}")
+        if use_zopfli:
+            print("🗜️  Deflate: Zopfli")
+        print("\n⏳ Compressing...")
+        
+        # Clone the whole document into the writer in one pass
+        writer.clone_reader_document_root(reader)
+        
+        # Apply compression - remove duplication
+        if params['remove_duplication']:
+            writer.add_metadata(reader.metadata or {})
+        
+        # Compress content streams
+        unchanged = compress_page_contents(writer.pages, use_zopfli)
+        print()  # New line after progress bar
+        if unchanged:
+            print(f"   {unchanged} page(s) already well compressed, kept as-is")
+        
+        # Serialize in memory so pypdf's many small writes never hit the disk
+        print(f"\n💾 Saving: {output_path.name}")
+        buffer = io.BytesIO()
+        writer.write(buffer)
     
-    # Write compressed PDF
-    print(f"\n💾 Saving: {output_path.name}")
+    # Write compressed PDF in one contiguous write
     with open(output_path, 'wb') as f:
-        writer.write(f)
+        f.write(buffer.getbuffer())
     
     # Get compressed file size
     compressed_size = output_path.stat().st_size
@@ -133,6 +242,7 @@ Examples:
   python compressor.py document.pdf
   python compressor.py document.pdf --quality low
   python compressor.py document.pdf --output compressed.pdf --quality high
+  python compressor.py document.pdf --zopfli
         '''
     )
     
@@ -147,6 +257,11 @@ Examples:
         '--output', '-o',
         help='Output file path (default: <input>_compressed.pdf)'
     )
+    parser.add_argument(
+        '--zopfli',
+        action='store_true',
+        help='Use Zopfli for smaller content streams (slower; default for high quality)'
+    )
     
     args = parser.parse_args()
     
@@ -159,7 +274,8 @@ Examples:
         original_size, compressed_size, output_path = compress_pdf(
             args.input,
             args.output,
-            args.quality
+            args.quality,
+            args.zopfli
         )
         
         # Calculate savings
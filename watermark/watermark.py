@@ -5,18 +5,27 @@ A local CLI tool for adding watermarks to images.
 
 Usage:
     python watermark.py <image.jpg> --text "© Your Name"
+    python watermark.py <a.jpg> <b.jpg> <c.png> --text "© Your Name"
     python watermark.py <image.jpg> --text "© 2024" --opacity 0.5 --position bottom-right
     python watermark.py <image.jpg> --text "CONFIDENTIAL" --tile
 
 Requirements:
     pip install Pillow pillow-heif
+
+    Optional, faster compositing/rotation (drop-in Pillow replacement):
+    pip uninstall Pillow && pip install pillow-simd
 """
 
 import argparse
+import functools
+import math
+import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 try:
+    import PIL
     from PIL import Image, ImageDraw, ImageFont
 except ImportError:
     print("Error: Pillow library not found.")
@@ -32,9 +41,16 @@ try:
 except ImportError:
     pass
 
+# Pillow-SIMD releases carry a ".postN" version suffix
+PILLOW_SIMD = '.post' in PIL.__version__
+
 
+@functools.lru_cache(maxsize=32)
 def get_font(size: int):
-    """Try to load a nice font, fall back to default if not available."""
+    """Try to load a nice font, fall back to default if not available.
+    
+    Fonts are cached per size, so repeated calls skip the file lookup and parsing.
+    """
     font_names = [
         "Arial Bold", "arial", "DejaVuSans-Bold", "DejaVuSans",
         "Helvetica", "FreeSansBold", "LiberationSans-Bold"
@@ -53,21 +69,45 @@ def get_font(size: int):
         return None
 
 
+# Horizontal and vertical anchor of each position: 0 = start, 1 = center, 2 = end
+POSITION_ANCHORS = {
+    'top-left': (0, 0), 'top-center': (1, 0), 'top-right': (2, 0),
+    'middle-left': (0, 1), 'center': (1, 1), 'middle-right': (2, 1),
+    'bottom-left': (0, 2), 'bottom-center': (1, 2), 'bottom-right': (2, 2)
+}
+
+
+def align(anchor: int, outer: int, inner: int, padding: int) -> int:
+    """Offset of a span of size inner within outer for the given anchor."""
+    if anchor == 0:
+        return padding
+    if anchor == 1:
+        return (outer - inner) // 2
+    return outer - inner - padding
+
+
 def get_position_coords(position: str, img_width: int, img_height: int, 
                         text_width: int, text_height: int, padding: int = 20):
     """Calculate x, y coordinates based on position name."""
-    positions = {
-        'top-left': (padding, padding),
-        'top-center': ((img_width - text_width) // 2, padding),
-        'top-right': (img_width - text_width - padding, padding),
-        'middle-left': (padding, (img_height - text_height) // 2),
-        'center': ((img_width - text_width) // 2, (img_height - text_height) // 2),
-        'middle-right': (img_width - text_width - padding, (img_height - text_height) // 2),
-        'bottom-left': (padding, img_height - text_height - padding),
-        'bottom-center': ((img_width - text_width) // 2, img_height - text_height - padding),
-        'bottom-right': (img_width - text_width - padding, img_height - text_height - padding)
-    }
-    return positions.get(position, positions['center'])
+    anchor_x, anchor_y = POSITION_ANCHORS.get(position, POSITION_ANCHORS['center'])
+    return (align(anchor_x, img_width, text_width, padding),
+            align(anchor_y, img_height, text_height, padding))
+
+
+def composite_at(base: Image.Image, image: Image.Image, x: int, y: int):
+    """Alpha-composite an image onto an RGBA or RGB base in place, clipped to its bounds."""
+    left, top = max(0, -x), max(0, -y)
+    right = min(image.width, base.width - x)
+    bottom = min(image.height, base.height - y)
+    
+    if left < right and top < bottom:
+        dest, source = (x + left, y + top), (left, top, right, bottom)
+        if base.mode == 'RGBA':
+            base.alpha_composite(image, dest, source)
+        else:
+            # On an opaque base, pasting through the alpha band is the same blend
+            clip = image.crop(source)
+            base.paste(clip, dest, clip)
 
 
 def add_watermark(image: Image.Image, text: str, font_size: int = 48, 
@@ -76,14 +116,13 @@ def add_watermark(image: Image.Image, text: str, font_size: int = 48,
                   rotation: int = -30) -> Image.Image:
     """Add watermark text to an image."""
     
-    # Convert image to RGBA for transparency support
-    if image.mode != 'RGBA':
+    # Work on an RGBA copy for transparency support; a single watermark only
+    # touches the text rectangle, so RGB images can stay RGB
+    if image.mode == 'RGBA' or (image.mode == 'RGB' and not tile):
+        image = image.copy()
+    else:
         image = image.convert('RGBA')
     
-    # Create a transparent overlay
-    overlay = Image.new('RGBA', image.size, (0, 0, 0, 0))
-    draw = ImageDraw.Draw(overlay)
-    
     # Get font
     font = get_font(font_size)
     
@@ -94,53 +133,81 @@ def add_watermark(image: Image.Image, text: str, font_size: int = 48,
     alpha = int(255 * opacity)
     
     # Get text size
-    bbox = draw.textbbox((0, 0), text, font=font)
+    bbox = ImageDraw.Draw(image).textbbox((0, 0), text, font=font)
     text_width = bbox[2] - bbox[0]
     text_height = bbox[3] - bbox[1]
     
     if tile:
-        # Create a larger canvas for rotation
-        diagonal = int((image.width ** 2 + image.height ** 2) ** 0.5)
-        tile_overlay = Image.new('RGBA', (diagonal * 2, diagonal * 2), (0, 0, 0, 0))
-        tile_draw = ImageDraw.Draw(tile_overlay)
-        
         spacing_x = int(text_width * 1.5)
         spacing_y = int(font_size * 2)
         
-        for y in range(0, diagonal * 2, spacing_y):
-            for x in range(0, diagonal * 2, spacing_x):
-                tile_draw.text((x, y), text, font=font, fill=(r, g, b, alpha))
+        # Rasterize and rotate the text once, as a single-band grid cell mask
+        stamp = Image.new('L', (spacing_x, spacing_y), 0)
+        ImageDraw.Draw(stamp).text((0, 0), text, font=font, fill=alpha)
+        if rotation % 90 == 0:
+            # Right angles are a lossless pixel reorder; no rotation at all for 0
+            quarter_turns = {90: Image.ROTATE_90, 180: Image.ROTATE_180, 270: Image.ROTATE_270}
+            if rotation % 360:
+                stamp = stamp.transpose(quarter_turns[rotation % 360])
+        else:
+            stamp = stamp.rotate(rotation, expand=True, resample=Image.BILINEAR)
+        
+        # Grid axes rotated along with the text (y points down)
+        angle = math.radians(rotation)
+        step_x = (spacing_x * math.cos(angle), -spacing_x * math.sin(angle))
+        step_y = (spacing_y * math.sin(angle), spacing_y * math.cos(angle))
         
-        # Rotate and crop
-        tile_overlay = tile_overlay.rotate(rotation, expand=False, center=(diagonal, diagonal))
+        # Enough cells along each axis to cover the image diagonal
+        radius = math.hypot(image.width, image.height) / 2
+        cols = math.ceil(radius / spacing_x) + 1
+        rows = math.ceil(radius / spacing_y) + 1
         
-        # Center crop to original size
-        left = (tile_overlay.width - image.width) // 2
-        top = (tile_overlay.height - image.height) // 2
-        tile_overlay = tile_overlay.crop((left, top, left + image.width, top + image.height))
+        # Paste the rotated stamp into a mask on the grid, centered on the image;
+        # only its inked pixels are copied, so overlapping corners don't clip text
+        mask = Image.new('L', image.size, 0)
+        inked = stamp.point(lambda value: 255 if value else 0)
+        origin_x = (image.width - stamp.width) / 2
+        origin_y = (image.height - stamp.height) / 2
+        for j in range(-rows, rows + 1):
+            for i in range(-cols, cols + 1):
+                x = round(origin_x + i * step_x[0] + j * step_y[0])
+                y = round(origin_y + i * step_x[1] + j * step_y[1])
+                mask.paste(stamp, (x, y), inked)
         
-        overlay = tile_overlay
+        # Fill the text color through the mask
+        overlay = Image.new('RGBA', image.size, (r, g, b, 0))
+        overlay.putalpha(mask)
+        
+        # Composite the overlay in place, only over its visible bounding box
+        bbox = overlay.getbbox()
+        if bbox:
+            image.alpha_composite(overlay, bbox[:2], bbox)
     else:
         # Single watermark
         x, y = get_position_coords(position, image.width, image.height, 
                                    text_width, text_height)
         
-        # Draw shadow
+        # Draw into a buffer sized to the text plus its shadow
         shadow_offset = max(2, font_size // 24)
-        draw.text((x + shadow_offset, y + shadow_offset), text, font=font, 
+        stamp = Image.new('RGBA', (bbox[2] + shadow_offset + 1, bbox[3] + shadow_offset + 1),
+                          (0, 0, 0, 0))
+        draw = ImageDraw.Draw(stamp)
+        
+        # Draw shadow
+        draw.text((shadow_offset, shadow_offset), text, font=font, 
                   fill=(0, 0, 0, alpha // 2))
         
         # Draw text
-        draw.text((x, y), text, font=font, fill=(r, g, b, alpha))
-    
-    # Composite the overlay onto the image
-    result = Image.alpha_composite(image, overlay)
+        draw.text((0, 0), text, font=font, fill=(r, g, b, alpha))
+        
+        composite_at(image, stamp, x, y)
     
-    return result
+    return image
 
 
-def process_image(input_path: str, output_path: str = None, **kwargs) -> str:
-    """Process a single image file."""
+def process_image(input_path: str, output_path: str = None, max_dim: int = None,
+                  jpeg_quality: int = 85, **kwargs) -> str:
+    """Process a single image file, optionally downscaling it to max_dim first."""
     
     input_file = Path(input_path)
     
@@ -158,6 +225,14 @@ def process_image(input_path: str, output_path: str = None, **kwargs) -> str:
     image = Image.open(input_path)
     print(f"   Size: {image.width} x {image.height}")
     
+    # Downscale oversize images with an integer box filter before watermarking
+    if max_dim and max(image.size) > max_dim:
+        factor = math.ceil(max(image.size) / max_dim)
+        if image.mode in ('P', '1', 'I;16'):
+            image = image.convert('RGBA')
+        image = image.reduce(factor)
+        print(f"   Reduced: {image.width} x {image.height} (1/{factor})")
+    
     # Add watermark
     print(f"📝 Adding watermark: \"{kwargs.get('text', '© 2024')}\"")
     result = add_watermark(image, **kwargs)
@@ -165,15 +240,24 @@ def process_image(input_path: str, output_path: str = None, **kwargs) -> str:
     # Save result
     print(f"💾 Saving: {output_path.name}")
     
-    # Convert to RGB if saving as JPEG
+    # Convert to RGB if saving as JPEG, with optimized Huffman tables and 4:2:0 chroma
     if output_path.suffix.lower() in ['.jpg', '.jpeg']:
-        result = result.convert('RGB')
-    
-    result.save(str(output_path), quality=95)
+        if result.mode != 'RGB':
+            result = result.convert('RGB')
+        result.save(str(output_path), quality=jpeg_quality, optimize=True,
+                    progressive=True, subsampling=2)
+    else:
+        result.save(str(output_path), quality=95)
     
     return str(output_path)
 
 
+def process_job(job: tuple) -> str:
+    """Process an (input_path, options) job in a batch worker process."""
+    input_path, options = job
+    return process_image(input_path, **options)
+
+
 def main():
     parser = argparse.ArgumentParser(
         description='Privacy-First Image Watermark - Add watermarks to images locally',
@@ -184,47 +268,65 @@ Examples:
   python watermark.py photo.png --text "DRAFT" --opacity 0.3 --color "#FF0000"
   python watermark.py photo.jpg --text "CONFIDENTIAL" --tile --rotation -45
   python watermark.py photo.jpg --text "© 2024" --position bottom-right --font-size 24
+  python watermark.py photo.jpg --text "PREVIEW" --max-dim 1600
+  python watermark.py *.jpg --text "© John Doe"
         '''
     )
     
-    parser.add_argument('input', help='Path to the image file')
+    parser.add_argument('input', nargs='+', help='Path(s) to the image file(s)')
     parser.add_argument('--text', '-t', default='© 2024', help='Watermark text (default: © 2024)')
     parser.add_argument('--font-size', '-s', type=int, default=48, help='Font size in pixels (default: 48)')
     parser.add_argument('--opacity', '-a', type=float, default=0.5, help='Opacity 0.0-1.0 (default: 0.5)')
     parser.add_argument('--color', '-c', default='#FFFFFF', help='Text color in hex (default: #FFFFFF)')
     parser.add_argument('--position', '-p', default='center',
-                        choices=['top-left', 'top-center', 'top-right',
-                                'middle-left', 'center', 'middle-right',
-                                'bottom-left', 'bottom-center', 'bottom-right'],
+                        choices=list(POSITION_ANCHORS),
                         help='Watermark position (default: center)')
     parser.add_argument('--tile', action='store_true', help='Tile watermark across entire image')
     parser.add_argument('--rotation', '-r', type=int, default=-30, help='Rotation angle in degrees (default: -30)')
     parser.add_argument('--output', '-o', help='Output file path (default: <input>_watermarked.<ext>)')
+    parser.add_argument('--jpeg-quality', '-q', type=int, default=85, help='JPEG output quality 1-95 (default: 85)')
+    parser.add_argument('--max-dim', type=int, help='Downscale so the longest side is at most this many pixels')
     
     args = parser.parse_args()
+    if args.output and len(args.input) > 1:
+        parser.error('--output can only be used with a single input file')
     
     print("\n" + "=" * 50)
     print("   🔒 Privacy-First Image Watermark")
     print("   All processing happens locally on your machine")
+    if PILLOW_SIMD:
+        print("   ⚡ Pillow-SIMD acceleration enabled")
     print("=" * 50)
     
+    options = dict(
+        max_dim=args.max_dim,
+        jpeg_quality=args.jpeg_quality,
+        text=args.text,
+        font_size=args.font_size,
+        opacity=args.opacity,
+        color=args.color,
+        position=args.position,
+        tile=args.tile,
+        rotation=args.rotation
+    )
+    
     try:
-        output_path = process_image(
-            args.input,
-            args.output,
-            text=args.text,
-            font_size=args.font_size,
-            opacity=args.opacity,
-            color=args.color,
-            position=args.position,
-            tile=args.tile,
-            rotation=args.rotation
-        )
+        if len(args.input) == 1:
+            output_paths = [process_image(args.input[0], args.output, **options)]
+        else:
+            # Images are independent, so spread them across worker processes
+            jobs = [(input_path, options) for input_path in args.input]
+            workers = min(os.cpu_count() or 1, 8, len(jobs))
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                output_paths = list(executor.map(process_job, jobs, chunksize=1))
         
         print("\n" + "=" * 50)
         print("   ✅ Watermark Applied Successfully!")
         print("=" * 50)
-        print(f"\n   📁 Output: {output_path}\n")
+        print()
+        for output_path in output_paths:
+            print(f"   📁 Output: {output_path}")
+        print()
         
     except FileNotFoundError as e:
         print(f"\n❌ Error: {e}")